@@ -0,0 +1,241 @@
+"""
+Funções compartilhadas pelos scripts de CloudFormation + S3.
+
+Os scripts 's3_cloudformation.py' e 's3_cloudformation_with_upload.py' usam o
+mesmo fluxo de criação, atualização, consulta e exclusão de stacks. Este módulo
+concentra esse fluxo (e os clientes do Boto3) em um único lugar.
+"""
+import boto3
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente de um arquivo .env
+load_dotenv()
+
+# Configuração dos clientes do Boto3: pool de conexões maior que o padrão (10),
+# para não serializar as chamadas feitas em paralelo pelas threads, retentativas
+# no modo 'adaptive' (que desacelera sozinho em caso de throttling) e TCP keepalive.
+BOTO_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True
+)
+
+# Sessão criada uma única vez e reaproveitada por todos os clientes
+_SESSION = boto3.session.Session()
+
+# Define o cliente do CloudFormation que usaremos para interagir com a AWS
+# É importante especificar a região para garantir consistência
+cf_client = _SESSION.client('cloudformation', region_name='us-east-1', config=BOTO_CONFIG)
+
+# Cliente do S3 reaproveitado pelas funções (em vez de um novo a cada chamada).
+# O cliente do Boto3 é thread-safe e pode ser compartilhado entre threads.
+s3_client = _SESSION.client('s3', config=BOTO_CONFIG)
+
+# Número de lotes de exclusão enviados simultaneamente ao esvaziar o bucket.
+DELETE_MAX_WORKERS = 16
+
+# Configuração dos waiters do CloudFormation: o padrão consulta a cada 30s, o que
+# acrescenta até 30s de espera ociosa em stacks rápidas. 5s x 120 tentativas = 10min.
+WAITER_CONFIG = {'Delay': 5, 'MaxAttempts': 120}
+
+# Cache em memória dos templates já lidos: caminho -> (conteúdo, hash SHA256)
+_TEMPLATE_CACHE = {}
+
+# Tag aplicada à stack com o hash do template usado no último deploy
+TEMPLATE_HASH_TAG = 'TemplateHash'
+
+# O CloudFormation aceita no máximo 51.200 bytes em 'TemplateBody'. Templates
+# maiores precisam ser publicados em um bucket S3 e referenciados por 'TemplateURL'.
+TEMPLATE_BODY_MAX_BYTES = 51200
+TEMPLATE_BUCKET = os.getenv('CF_TEMPLATE_BUCKET')
+
+
+def describe_stack(stack_name):
+    """
+    Retorna o dicionário de descrição da stack, ou None se ela não existir.
+    Centraliza a chamada 'describe_stacks' para que o resultado possa ser
+    reaproveitado pelas demais funções, evitando idas e voltas repetidas à API.
+    """
+    try:
+        response = cf_client.describe_stacks(StackName=stack_name)
+        return response["Stacks"][0]
+    except ClientError as e:
+        # A exceção 'ValidationError' com a mensagem "does not exist" é a forma
+        # que a API nos diz que a stack não foi encontrada.
+        code = e.response['Error']['Code']
+        message = e.response['Error']['Message']
+        if code == 'ValidationError' and "does not exist" in message:
+            return None
+        raise
+
+def stack_exists(stack_name):
+    """Verifica se uma stack do CloudFormation já existe."""
+    return describe_stack(stack_name) is not None
+
+def _read_template(template_path):
+    """
+    Lê um template do disco (apenas na primeira vez) e calcula seu hash SHA256.
+    Leituras seguintes do mesmo caminho são atendidas pelo cache em memória.
+    """
+    if template_path not in _TEMPLATE_CACHE:
+        logging.info(f"Lendo o arquivo de template: {template_path}")
+        with open(template_path, 'r') as f:
+            template_body = f.read()
+        template_hash = hashlib.sha256(template_body.encode()).hexdigest()
+        _TEMPLATE_CACHE[template_path] = (template_body, template_hash)
+    return _TEMPLATE_CACHE[template_path]
+
+def _template_args(template_path, template_body, template_hash):
+    """
+    Monta o argumento de template para create_stack/update_stack.
+    Templates pequenos vão direto no corpo da requisição; os que passam do limite
+    do CloudFormation são enviados ao bucket de staging (CF_TEMPLATE_BUCKET).
+    """
+    if os.path.getsize(template_path) <= TEMPLATE_BODY_MAX_BYTES:
+        return {'TemplateBody': template_body}
+
+    if not TEMPLATE_BUCKET:
+        raise ValueError(
+            f"O template '{template_path}' excede {TEMPLATE_BODY_MAX_BYTES} bytes. "
+            "Defina CF_TEMPLATE_BUCKET com um bucket S3 para hospedá-lo."
+        )
+
+    # O hash no nome do objeto evita reenviar o mesmo template várias vezes
+    key = f"cloudformation/{template_hash}-{os.path.basename(template_path)}"
+    logging.info(f"Template maior que {TEMPLATE_BODY_MAX_BYTES} bytes. Enviando para s3://{TEMPLATE_BUCKET}/{key}")
+    s3_client.put_object(Bucket=TEMPLATE_BUCKET, Key=key, Body=template_body.encode())
+    return {'TemplateURL': f"https://{TEMPLATE_BUCKET}.s3.amazonaws.com/{key}"}
+
+def deploy_stack(stack_name, template_path):
+    """
+    Cria uma nova stack ou atualiza uma existente.
+    Diferente do 'aws cloudformation deploy', o Boto3 exige que a gente
+    verifique se a stack existe para saber se devemos criar ou atualizar.
+    O hash do template fica registrado em uma tag da stack; se ele não mudou,
+    a chamada de atualização nem chega a ser feita.
+    """
+    template_body, template_hash = _read_template(template_path)
+    tags = [{'Key': TEMPLATE_HASH_TAG, 'Value': template_hash}]
+
+    stack = describe_stack(stack_name)
+    if stack is not None:
+        deployed_hash = next((t['Value'] for t in stack.get('Tags', []) if t['Key'] == TEMPLATE_HASH_TAG), None)
+        if deployed_hash == template_hash:
+            logging.info(f"Template inalterado (SHA256 {template_hash[:12]}...). A stack já está no estado desejado.")
+            return
+
+        logging.info(f"Stack '{stack_name}' já existe. Iniciando atualização...")
+        try:
+            # Tenta atualizar a stack
+            cf_client.update_stack(
+                StackName=stack_name,
+                **_template_args(template_path, template_body, template_hash),
+                Capabilities=['CAPABILITY_IAM'], # Boa prática incluir, caso o template crie roles
+                Tags=tags
+            )
+            # 'waiter' é um recurso do Boto3 que pausa o script até a operação terminar
+            waiter = cf_client.get_waiter('stack_update_complete')
+            waiter.wait(StackName=stack_name, WaiterConfig=WAITER_CONFIG)
+            logging.info("Atualização da stack concluída com sucesso!")
+        except ClientError as e:
+            # Se não houver mudanças, a API retorna um erro específico que podemos ignorar
+            if "No updates are to be performed" in e.response['Error']['Message']:
+                logging.info("Nenhuma atualização necessária. A stack já está no estado desejado.")
+            else:
+                raise
+    else:
+        logging.info(f"Stack '{stack_name}' não encontrada. Iniciando criação...")
+        # Cria a stack, pois ela não existe
+        cf_client.create_stack(
+            StackName=stack_name,
+            **_template_args(template_path, template_body, template_hash),
+            Capabilities=['CAPABILITY_IAM'],
+            Tags=tags
+        )
+        # Pausa o script até a criação da stack terminar
+        waiter = cf_client.get_waiter('stack_create_complete')
+        waiter.wait(StackName=stack_name, WaiterConfig=WAITER_CONFIG)
+        logging.info("Criação da stack concluída com sucesso!")
+
+def get_stack_outputs(stack_name, stack=None):
+    """
+    Busca, exibe e retorna os Outputs de uma stack como um dicionário.
+    Se a descrição da stack já foi obtida pelo chamador, evita uma nova chamada à API.
+    """
+    if stack is None:
+        stack = describe_stack(stack_name)
+    if stack is None:
+        logging.warning(f"Stack '{stack_name}' não existe. Não é possível obter outputs.")
+        return None
+
+    outputs = stack.get("Outputs", [])
+    if not outputs:
+        logging.info("A stack não possui outputs.")
+        return None
+
+    logging.info("--- Outputs da Stack ---")
+    output_dict = {}
+    for output in outputs:
+        logging.info(f"  {output['OutputKey']}: {output['OutputValue']}")
+        output_dict[output['OutputKey']] = output['OutputValue']
+    logging.info("------------------------")
+    return output_dict
+
+def empty_bucket(bucket_name):
+    """
+    Remove todos os objetos de um bucket S3, incluindo todas as versões e os
+    marcadores de exclusão (delete markers) de buckets com versionamento.
+    Sem isso, o bucket não fica vazio e a exclusão da stack falha após o waiter.
+    Cada página do 'list_object_versions' traz até 1000 entradas, exatamente o limite
+    aceito pelo 'delete_objects', então cada página vira um lote apagado em paralelo.
+    Em buckets sem versionamento, cada objeto aparece com a versão 'null'.
+    """
+    paginator = s3_client.get_paginator('list_object_versions')
+
+    with ThreadPoolExecutor(max_workers=DELETE_MAX_WORKERS) as executor:
+        futures = []
+        for page in paginator.paginate(Bucket=bucket_name):
+            objects = [
+                {'Key': version['Key'], 'VersionId': version['VersionId']}
+                for version in page.get('Versions', []) + page.get('DeleteMarkers', [])
+            ]
+            if objects:
+                futures.append(executor.submit(
+                    s3_client.delete_objects,
+                    Bucket=bucket_name,
+                    Delete={'Objects': objects}
+                ))
+
+        for future in as_completed(futures):
+            # 'delete_objects' não lança exceção para falhas individuais: elas vêm em 'Errors'
+            errors = future.result().get('Errors', [])
+            if errors:
+                raise RuntimeError(f"Falha ao excluir {len(errors)} objeto(s), ex.: {errors[0]['Key']} - {errors[0]['Message']}")
+
+def delete_stack(stack_name, stack=None):
+    """Exclui uma stack do CloudFormation."""
+    # Antes de excluir, é preciso esvaziar o bucket S3
+    try:
+        outputs = get_stack_outputs(stack_name, stack)
+        bucket_name = outputs.get('NomeDoBucketCriado') if outputs else None
+
+        if bucket_name:
+            logging.info(f"Esvaziando o bucket S3: {bucket_name}")
+            empty_bucket(bucket_name)
+            logging.info("Bucket esvaziado com sucesso.")
+
+    except Exception as e:
+        logging.error(f"Não foi possível esvaziar o bucket antes da exclusão: {e}")
+        # Mesmo com erro, tentamos prosseguir com a exclusão da stack
+
+    logging.info(f"Iniciando exclusão da stack '{stack_name}'...")
+    cf_client.delete_stack(StackName=stack_name)
+    waiter = cf_client.get_waiter('stack_delete_complete')
+    waiter.wait(StackName=stack_name, WaiterConfig=WAITER_CONFIG)
+    logging.info("Stack excluída com sucesso.")
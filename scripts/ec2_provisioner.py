@@ -9,8 +9,8 @@ Autor: Prof. Diego Garrido (Refatorado por GPT-4.1)
 Data: 2024-09-13
 """
 import os
-import boto3
-from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente de um arquivo .env
@@ -28,6 +28,36 @@ KEY_NAME = os.getenv('KEY_NAME')
 SECURITY_GROUP_IDS = os.getenv('SECURITY_GROUP_IDS').split(',') if os.getenv('SECURITY_GROUP_IDS') else []
 SUBNET_ID = os.getenv('SUBNET_ID')
 TAG_NAME = os.getenv('TAG_NAME', 'MyEC2-Boto3')
+INSTANCE_COUNT = int(os.getenv('INSTANCE_COUNT', '1'))
+
+# Número máximo de provisionamentos simultâneos em provision_many
+PROVISION_MAX_WORKERS = 10
+
+
+@lru_cache(maxsize=None)
+def _get_ec2_client():
+    """
+    Cria o cliente EC2 na primeira chamada e o reaproveita nas seguintes.
+
+    O boto3 é importado aqui, e não no topo do módulo, porque sua importação
+    carrega centenas de submódulos; assim o custo só é pago quando o script
+    realmente vai falar com a AWS. Construir o cliente também carrega os modelos
+    do serviço e monta o resolvedor de endpoints, por isso ele é criado uma única vez.
+    """
+    import boto3
+    from botocore.config import Config
+
+    # Pool de conexões maior que o padrão (10), para não serializar as chamadas
+    # feitas em paralelo, retentativas no modo 'adaptive' (que desacelera sozinho
+    # em caso de throttling) e TCP keepalive.
+    config = Config(
+        max_pool_connections=50,
+        retries={'max_attempts': 10, 'mode': 'adaptive'},
+        tcp_keepalive=True
+    )
+    # O cliente de baixo nível é usado em vez de boto3.resource: para uma única
+    # chamada que só precisa dos IDs, a camada de objetos do resource é custo extra
+    return boto3.session.Session().client('ec2', config=config)
 
 
 def provisionar_instancia_ec2(
@@ -36,10 +66,14 @@ def provisionar_instancia_ec2(
     key_name: str,
     security_group_ids: list,
     subnet_id: str,
-    tag_name: str
-) -> str:
+    tag_name: str,
+    count: int = 1
+) -> list:
     """
-    Cria e provisiona uma nova instância EC2 na AWS.
+    Cria e provisiona uma ou mais instâncias EC2 idênticas na AWS.
+
+    Todas as instâncias são lançadas por uma única chamada à API, usando
+    MinCount/MaxCount, em vez de uma chamada por instância.
 
     Args:
         ami_id (str): ID da Amazon Machine Image (AMI) a ser usada.
@@ -48,22 +82,25 @@ def provisionar_instancia_ec2(
         security_group_ids (list): Lista de IDs de Security Groups.
         subnet_id (str): ID da Subnet na VPC para a instância.
         tag_name (str): Valor da tag 'Name' para a instância.
+        count (int, opcional): Quantidade de instâncias a serem criadas. Padrão: 1.
 
     Returns:
-        str: O ID da instância EC2 recém-criada.
+        list: Os IDs das instâncias EC2 recém-criadas.
 
     Raises:
         ClientError: Se ocorrer um erro durante a chamada à API da AWS.
         Exception: Para outros erros inesperados.
     """
+    from botocore.exceptions import ClientError
+
     try:
-        ec2 = boto3.resource('ec2')
-        print('Iniciando o provisionamento de uma nova instância EC2...')
+        print(f'Iniciando o provisionamento de {count} instância(s) EC2...')
         
-        instance = ec2.create_instances(
+        # MinCount igual a MaxCount: ou todas as instâncias são criadas, ou nenhuma
+        response = _get_ec2_client().run_instances(
             ImageId=ami_id,
-            MinCount=1,
-            MaxCount=1,
+            MinCount=count,
+            MaxCount=count,
             InstanceType=instance_type,
             KeyName=key_name,
             SecurityGroupIds=security_group_ids,
@@ -74,9 +111,9 @@ def provisionar_instancia_ec2(
             }]
         )
         
-        instance_id = instance[0].id
-        print(f'Instância EC2 provisionada com sucesso! Name: {tag_name}')
-        return instance_id
+        instance_ids = [instance['InstanceId'] for instance in response['Instances']]
+        print(f'{len(instance_ids)} instância(s) EC2 provisionada(s) com sucesso! Name: {tag_name}')
+        return instance_ids
 
     except ClientError as e:
         print(f'Erro na API da AWS: {e.response["Error"]["Code"]} - {e.response["Error"]["Message"]}')
@@ -86,20 +123,51 @@ def provisionar_instancia_ec2(
         raise
 
 
+def provision_many(configs: list) -> list:
+    """
+    Provisiona, em paralelo, instâncias EC2 com configurações diferentes entre si.
+
+    Cada configuração gera uma chamada independente à API; as chamadas são
+    disparadas simultaneamente para sobrepor a latência de rede de cada uma.
+    Para instâncias idênticas, prefira o parâmetro 'count' de
+    provisionar_instancia_ec2, que resolve tudo em uma única chamada.
+
+    Args:
+        configs (list): Lista de dicionários com os argumentos nomeados de
+            provisionar_instancia_ec2 (ami_id, instance_type, key_name, etc.).
+
+    Returns:
+        list: Os IDs de todas as instâncias criadas, na ordem em que ficaram prontas.
+
+    Raises:
+        ClientError: Se alguma das chamadas à API da AWS falhar.
+    """
+    # Cria o cliente antes de abrir as threads, para que todas usem a mesma instância
+    _get_ec2_client()
+
+    instance_ids = []
+    with ThreadPoolExecutor(max_workers=PROVISION_MAX_WORKERS) as executor:
+        futures = [executor.submit(provisionar_instancia_ec2, **config) for config in configs]
+        for future in as_completed(futures):
+            instance_ids.extend(future.result())
+    return instance_ids
+
+
 def main() -> None:
     """Função principal para executar o fluxo de provisionamento."""
     print('Iniciando o processo de criação de instância EC2...')
     try:
         # Chama a função de provisionamento com os parâmetros definidos
-        instance_id = provisionar_instancia_ec2(
+        instance_ids = provisionar_instancia_ec2(
             ami_id=AMI_ID,
             instance_type=INSTANCE_TYPE,
             key_name=KEY_NAME,
             security_group_ids=SECURITY_GROUP_IDS,
             subnet_id=SUBNET_ID,
-            tag_name=TAG_NAME
+            tag_name=TAG_NAME,
+            count=INSTANCE_COUNT
         )
-        print(f'Processo concluído. Instância criada com ID: {instance_id}')
+        print(f'Processo concluído. Instância(s) criada(s) com ID: {", ".join(instance_ids)}')
     except Exception:
         print('O processo de criação foi interrompido devido a um erro.')
 
@@ -14,15 +14,16 @@ KEY_PAIR_NAME = 'vockey'
 
 
 def create_ec2_instance():
-    ec2 = boto3.resource('ec2')
-    instance = ec2.create_instances(
+    ec2 = boto3.client('ec2')
+    response = ec2.run_instances(
         ImageId=AMI_ID,
         MinCount=1,
         MaxCount=1,
         InstanceType=INSTANCE_TYPE,
         KeyName=KEY_PAIR_NAME
     )
-    print(f"Instância EC2 criada: {instance[0].id}")
+    instance_id = response['Instances'][0]['InstanceId']
+    print(f"Instância EC2 criada: {instance_id}")
 
 if __name__ == "__main__":
     create_ec2_instance()
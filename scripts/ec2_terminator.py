@@ -8,13 +8,56 @@ convenções da linguagem Python (PEP 8).
 Autor: Prof. Diego Garrido (Refatorado por GPT-4.1)
 Data: 2024-09-13
 """
-import boto3
-from botocore.exceptions import ClientError
+import os
+from functools import lru_cache
+from operator import itemgetter
+from dotenv import load_dotenv
 
+# Carrega variáveis de ambiente de um arquivo .env
+load_dotenv()
 
-def listar_instancias_ec2() -> list:
+# Prefixo opcional da tag 'Name' para restringir as instâncias listadas
+NAME_PREFIX = os.getenv('TERMINATOR_NAME_PREFIX')
+
+# Instâncias já encerradas ('terminated') ou em encerramento não interessam a este
+# script, então são descartadas pela própria AWS (filtro no lado do servidor).
+ESTADOS_LISTADOS = ['pending', 'running', 'stopping', 'stopped']
+
+# Quantidade máxima de IDs aceita por uma chamada a terminate_instances
+MAX_IDS_POR_CHAMADA = 1000
+
+
+@lru_cache(maxsize=None)
+def _get_ec2_client():
+    """
+    Cria o cliente EC2 na primeira chamada e o reaproveita nas seguintes.
+
+    O boto3 é importado aqui, e não no topo do módulo, porque sua importação
+    carrega centenas de submódulos; assim o custo só é pago quando o script
+    realmente vai falar com a AWS. Construir o cliente também carrega os modelos
+    do serviço e monta o resolvedor de endpoints, por isso ele é criado uma única vez.
+    """
+    import boto3
+    from botocore.config import Config
+
+    # Pool de conexões maior que o padrão (10), para não serializar as chamadas
+    # feitas em paralelo, retentativas no modo 'adaptive' (que desacelera sozinho
+    # em caso de throttling) e TCP keepalive.
+    config = Config(
+        max_pool_connections=50,
+        retries={'max_attempts': 10, 'mode': 'adaptive'},
+        tcp_keepalive=True
+    )
+    return boto3.session.Session().client('ec2', config=config)
+
+
+def listar_instancias_ec2(name_prefix: str = None) -> list:
     """
-    Lista todas as instâncias EC2 na conta AWS.
+    Lista as instâncias EC2 da conta AWS que ainda podem ser encerradas.
+
+    Args:
+        name_prefix (str, opcional): Se informado, lista apenas as instâncias cuja
+            tag 'Name' começa com este prefixo.
 
     Retorna:
         list: Uma lista de dicionários, onde cada dicionário contém o ID,
@@ -24,24 +67,29 @@ def listar_instancias_ec2() -> list:
     Raises:
         ClientError: Se ocorrer um erro durante a chamada à API da AWS.
     """
+    from botocore.exceptions import ClientError
+
     try:
-        ec2_client = boto3.client('ec2')
-        response = ec2_client.describe_instances()
+        # O paginator garante que todas as páginas sejam lidas; uma única chamada
+        # a describe_instances retornaria apenas a primeira página de resultados.
+        paginator = _get_ec2_client().get_paginator('describe_instances')
+
+        filters = [{'Name': 'instance-state-name', 'Values': ESTADOS_LISTADOS}]
+        if name_prefix:
+            filters.append({'Name': 'tag:Name', 'Values': [f'{name_prefix}*']})
 
         instancias = []
-        for reservation in response.get('Reservations', []):
-            for instance in reservation.get('Instances', []):
-                instance_id = instance.get('InstanceId')
-                state = instance.get('State', {}).get('Name')
-                name = 'N/A'
-                
-                # Busca a tag 'Name'
-                for tag in instance.get('Tags', []):
-                    if tag.get('Key') == 'Name':
-                        name = tag.get('Value')
-                        break
-                
-                instancias.append({'id': instance_id, 'state': state, 'name': name})
+        for page in paginator.paginate(Filters=filters):
+            instancias.extend(
+                {
+                    'id': instance['InstanceId'],
+                    'state': instance['State']['Name'],
+                    # Busca a tag 'Name' (o gerador para na primeira ocorrência)
+                    'name': next((tag['Value'] for tag in instance.get('Tags', []) if tag['Key'] == 'Name'), 'N/A'),
+                }
+                for reservation in page.get('Reservations', [])
+                for instance in reservation.get('Instances', [])
+            )
         
         return instancias
 
@@ -53,30 +101,37 @@ def listar_instancias_ec2() -> list:
         raise
 
 
-def encerrar_instancia_ec2(instance_id: str) -> None:
+def encerrar_instancias_ec2(instance_ids: list) -> None:
     """
-    Encerra (termina) uma instância EC2 na AWS.
+    Encerra (termina) uma ou mais instâncias EC2 na AWS.
+
+    Todas as instâncias são enviadas na mesma requisição (a API aceita até
+    1000 IDs por chamada), em vez de uma chamada por instância.
 
     Args:
-        instance_id (str): O ID da instância EC2 a ser encerrada.
+        instance_ids (list): Lista de IDs das instâncias EC2 a serem encerradas.
 
     Raises:
         ClientError: Se ocorrer um erro durante a chamada à API da AWS.
     """
+    from botocore.exceptions import ClientError
+
     try:
-        ec2_client = boto3.client('ec2')
-        print(f"Iniciando o encerramento da instância EC2: {instance_id}")
-        ec2_client.terminate_instances(InstanceIds=[instance_id])
-        print(f"Instância EC2 {instance_id} encerrada com sucesso!")
+        ec2_client = _get_ec2_client()
+        print(f"Iniciando o encerramento das instâncias EC2: {', '.join(instance_ids)}")
+        for inicio in range(0, len(instance_ids), MAX_IDS_POR_CHAMADA):
+            lote = instance_ids[inicio:inicio + MAX_IDS_POR_CHAMADA]
+            ec2_client.terminate_instances(InstanceIds=lote)
+        print(f"{len(instance_ids)} instância(s) EC2 encerrada(s) com sucesso!")
         
     except ClientError as e:
         if e.response['Error']['Code'] == 'InvalidInstanceID.NotFound':
-            print(f"Erro: A instância com o ID '{instance_id}' não foi encontrada.")
+            print(f"Erro: Uma ou mais instâncias não foram encontradas: {e.response['Error']['Message']}")
         else:
             print(f"Erro na API da AWS: {e.response['Error']['Code']} - {e.response['Error']['Message']}")
         raise
     except Exception as e:
-        print(f"Ocorreu um erro inesperado ao encerrar a instância {instance_id}: {e}")
+        print(f"Ocorreu um erro inesperado ao encerrar as instâncias {instance_ids}: {e}")
         raise
 
 
@@ -84,7 +139,7 @@ def main() -> None:
     """Função principal para executar o fluxo de encerramento de instâncias."""
     try:
         print("Listando instâncias EC2 disponíveis...")
-        instancias = listar_instancias_ec2()
+        instancias = listar_instancias_ec2(NAME_PREFIX)
         
         if not instancias:
             print("Não há instâncias EC2 disponíveis para listar.")
@@ -92,20 +147,22 @@ def main() -> None:
 
         print("\nInstâncias EC2 disponíveis:")
         # Ordena as instâncias pelo estado e depois pelo nome, para melhor visualização
-        instancias_ordenadas = sorted(instancias, key=lambda x: (x['state'], x['name']))
+        instancias_ordenadas = sorted(instancias, key=itemgetter('state', 'name'))
 
         for idx, instancia in enumerate(instancias_ordenadas):
             print(f"{idx + 1}. ID: {instancia['id']}, Estado: {instancia['state']}, Nome: {instancia['name']}")
         
         try:
-            escolha = int(input("\nDigite o número da instância que deseja encerrar: ")) - 1
-            if 0 <= escolha < len(instancias_ordenadas):
-                instance_id = instancias_ordenadas[escolha]['id']
-                encerrar_instancia_ec2(instance_id)
+            entrada = input("\nDigite o(s) número(s) da(s) instância(s) que deseja encerrar, separados por vírgula: ")
+            escolhas = [int(valor) - 1 for valor in entrada.split(',') if valor.strip()]
+            if escolhas and all(0 <= escolha < len(instancias_ordenadas) for escolha in escolhas):
+                # dict.fromkeys remove índices repetidos mantendo a ordem digitada
+                instance_ids = [instancias_ordenadas[escolha]['id'] for escolha in dict.fromkeys(escolhas)]
+                encerrar_instancias_ec2(instance_ids)
             else:
                 print("Escolha inválida. O processo foi abortado.")
         except ValueError:
-            print("Entrada inválida. Por favor, digite um número inteiro. O processo foi abortado.")
+            print("Entrada inválida. Por favor, digite números inteiros. O processo foi abortado.")
 
     except Exception:
         print("O processo foi interrompido devido a um erro.")
@@ -1,12 +1,15 @@
-import boto3
 import logging
 import os
 import mimetypes # Para detectar tipos de conteúdo dos arquivos
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
+# Funções de stack e clientes compartilhados com o s3_cloudformation.py
+from _cf_common import s3_client, describe_stack, deploy_stack, get_stack_outputs, delete_stack
 
 # --- Configuração Inicial ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-cf_client = boto3.client('cloudformation', region_name='us-east-1')
+logger = logging.getLogger(__name__)
 
 # --- Configuração de Caminhos ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,158 +20,146 @@ TEMPLATE_V2_PATH = os.path.join(PROJECT_ROOT, 'configs', 's3-bucket-v2.yaml')
 ASSETS_S3_DIR = os.path.join(PROJECT_ROOT, 'assets', 's3') # Local dos arquivos para upload
 
 # --- UPLOAD DE ARQUIVOS PARA O S3 ---
-def upload_assets_to_s3(bucket_name, local_directory):
+# Número de uploads simultâneos. Cada PUT no S3 é limitado pela latência de rede,
+# então várias threads conseguem sobrepor o tempo de espera das requisições.
+UPLOAD_MAX_WORKERS = 32
+
+def _walk_files(directory):
+    """
+    Percorre recursivamente um diretório e gera as entradas (os.DirEntry) de arquivos.
+    O os.scandir já traz o tipo de cada entrada na própria listagem do diretório,
+    evitando as chamadas 'stat' extras e as listas intermediárias do os.walk.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                # Assim como o os.walk, não segue links simbólicos para diretórios
+                if not entry.is_symlink():
+                    yield from _walk_files(entry.path)
+            else:
+                yield entry
+
+def collect_assets(local_directory):
+    """
+    Varre um diretório local e monta a lista de arquivos a enviar, no formato
+    (caminho local, chave no S3, Content-Type, tamanho em bytes), mantendo a
+    estrutura de subdiretórios.
+    Não depende do bucket, então pode ser executada enquanto a stack ainda é criada.
     """
-    Varre um diretório local e faz o upload de todos os arquivos para um bucket S3,
+    assets = []
+    # Inicializa a base de MIME types uma única vez e memoriza o Content-Type
+    # por extensão, evitando repetir a busca para cada arquivo
+    mimetypes.init()
+    content_types = {}
+    for entry in _walk_files(local_directory):
+        # Caminho completo do arquivo local
+        local_path = entry.path
+
+        # Gera o caminho relativo para ser usado como chave do objeto no S3
+        relative_path = os.path.relpath(local_path, local_directory)
+        s3_key = relative_path.replace(os.sep, "/") # Garante barras normais no S3
+
+        # Adivinha o tipo de conteúdo (MIME type) do arquivo pela extensão
+        ext = os.path.splitext(entry.name)[1]
+        content_type = content_types.get(ext)
+        if content_type is None:
+            # 'application/octet-stream' é o padrão genérico
+            content_type = mimetypes.guess_type(entry.name)[0] or 'application/octet-stream'
+            content_types[ext] = content_type
+
+        assets.append((local_path, s3_key, content_type, entry.stat().st_size))
+    return assets
+
+def upload_assets_to_s3(bucket_name, local_directory, assets=None):
+    """
+    Faz o upload de todos os arquivos de um diretório local para um bucket S3,
     mantendo a estrutura de subdiretórios e definindo o Content-Type.
+    Os uploads são independentes entre si e, por isso, executados em paralelo.
+    Se 'assets' já tiver sido montada por collect_assets, a varredura não é refeita.
     """
-    logging.info(f"Iniciando upload de arquivos de '{local_directory}' para o bucket '{bucket_name}'...")
-    s3_client = boto3.client('s3')
+    logger.info(f"Iniciando upload de arquivos de '{local_directory}' para o bucket '{bucket_name}'...")
+    # O cliente do Boto3 (s3_client) é thread-safe e pode ser compartilhado entre as threads
+    # Arquivos grandes (acima de 8 MB) são enviados em partes (multipart upload),
+    # com até 10 partes simultâneas por arquivo. Os arquivos pequenos continuam
+    # sendo paralelizados pelo ThreadPoolExecutor abaixo.
+    transfer_config = TransferConfig(
+        multipart_threshold=8 * 1024 * 1024,
+        multipart_chunksize=8 * 1024 * 1024,
+        max_concurrency=10,
+        use_threads=True
+    )
+
+    if assets is None:
+        assets = collect_assets(local_directory)
 
     try:
-        # os.walk percorre recursivamente a árvore de diretórios
-        for root, _, files in os.walk(local_directory):
-            for filename in files:
-                # Monta o caminho completo do arquivo local
-                local_path = os.path.join(root, filename)
-                
-                # Gera o caminho relativo para ser usado como chave do objeto no S3
-                relative_path = os.path.relpath(local_path, local_directory)
-                s3_key = relative_path.replace(os.sep, "/") # Garante barras normais no S3
-
-                # Adivinha o tipo de conteúdo (MIME type) do arquivo
-                content_type, _ = mimetypes.guess_type(local_path)
-                if content_type is None:
-                    content_type = 'application/octet-stream' # Padrão genérico
-
-                logging.info(f"  -> Uploading {local_path} para s3://{bucket_name}/{s3_key}")
-                
+        with ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS) as executor:
+            futures = []
+            # Log por arquivo apenas em nível DEBUG: com milhares de arquivos, formatar
+            # e emitir uma mensagem para cada um vira um custo perceptível
+            debug = logger.isEnabledFor(logging.DEBUG)
+            for local_path, s3_key, content_type, _ in assets:
+                if debug:
+                    logger.debug("  -> Uploading %s para s3://%s/%s", local_path, bucket_name, s3_key)
                 # Faz o upload do arquivo com os metadados corretos
-                s3_client.upload_file(
+                futures.append(executor.submit(
+                    s3_client.upload_file,
                     local_path,
                     bucket_name,
                     s3_key,
-                    ExtraArgs={'ContentType': content_type}
-                )
-        logging.info("Upload de todos os arquivos concluído com sucesso!")
+                    ExtraArgs={'ContentType': content_type},
+                    Config=transfer_config
+                ))
+
+            # as_completed propaga as exceções ocorridas dentro das threads
+            for future in as_completed(futures):
+                future.result()
+        total_bytes = sum(size for *_, size in assets)
+        logger.info("Upload de todos os arquivos concluído com sucesso! %d arquivo(s), %d bytes no total.", len(assets), total_bytes)
     except Exception as e:
-        logging.error(f"Ocorreu um erro durante o upload dos arquivos: {e}")
+        logger.error(f"Ocorreu um erro durante o upload dos arquivos: {e}")
         raise
 
-# ... (o resto das funções stack_exists, deploy_stack, get_stack_outputs permanecem iguais) ...
-def stack_exists(stack_name):
-    try:
-        cf_client.describe_stacks(StackName=stack_name)
-        return True
-    except ClientError as e:
-        if "does not exist" in e.response['Error']['Message']:
-            return False
-        else:
-            raise
-
-def deploy_stack(stack_name, template_path):
-    logging.info(f"Lendo o arquivo de template: {template_path}")
-    with open(template_path, 'r') as f:
-        template_body = f.read()
-
-    if stack_exists(stack_name):
-        logging.info(f"Stack '{stack_name}' já existe. Iniciando atualização...")
-        try:
-            cf_client.update_stack(
-                StackName=stack_name,
-                TemplateBody=template_body,
-                Capabilities=['CAPABILITY_IAM']
-            )
-            waiter = cf_client.get_waiter('stack_update_complete')
-            waiter.wait(StackName=stack_name)
-            logging.info("Atualização da stack concluída com sucesso!")
-        except ClientError as e:
-            if "No updates are to be performed" in e.response['Error']['Message']:
-                logging.info("Nenhuma atualização necessária. A stack já está no estado desejado.")
-            else:
-                raise
-    else:
-        logging.info(f"Stack '{stack_name}' não encontrada. Iniciando criação...")
-        cf_client.create_stack(
-            StackName=stack_name,
-            TemplateBody=template_body,
-            Capabilities=['CAPABILITY_IAM']
-        )
-        waiter = cf_client.get_waiter('stack_create_complete')
-        waiter.wait(StackName=stack_name)
-        logging.info("Criação da stack concluída com sucesso!")
-
-def get_stack_outputs(stack_name):
-    if not stack_exists(stack_name):
-        logging.warning(f"Stack '{stack_name}' não existe. Não é possível obter outputs.")
-        return None
-
-    response = cf_client.describe_stacks(StackName=stack_name)
-    outputs = response["Stacks"][0].get("Outputs", [])
-    if not outputs:
-        logging.info("A stack não possui outputs.")
-        return None
-
-    logging.info("--- Outputs da Stack ---")
-    output_dict = {}
-    for output in outputs:
-        logging.info(f"  {output['OutputKey']}: {output['OutputValue']}")
-        output_dict[output['OutputKey']] = output['OutputValue']
-    logging.info("------------------------")
-    return output_dict
-
-def delete_stack(stack_name):
-    outputs = get_stack_outputs(stack_name)
-    bucket_name = outputs.get('NomeDoBucketCriado') if outputs else None
-
-    if bucket_name:
-        try:
-            logging.info(f"Esvaziando o bucket S3: {bucket_name}")
-            s3 = boto3.resource('s3')
-            bucket = s3.Bucket(bucket_name)
-            bucket.objects.all().delete()
-            logging.info("Bucket esvaziado com sucesso.")
-        except Exception as e:
-            logging.error(f"Não foi possível esvaziar o bucket antes da exclusão: {e}")
-
-    logging.info(f"Iniciando exclusão da stack '{stack_name}'...")
-    cf_client.delete_stack(StackName=stack_name)
-    waiter = cf_client.get_waiter('stack_delete_complete')
-    waiter.wait(StackName=stack_name)
-    logging.info("Stack excluída com sucesso.")
-
 
 # --- Fluxo de Execução Principal ---
 if __name__ == '__main__':
     try:
         # ETAPA 1
-        logging.info("--- INICIANDO ETAPA 1: DEPLOY DA V1 (BUCKET PRIVADO) ---")
+        logger.info("--- INICIANDO ETAPA 1: DEPLOY DA V1 (BUCKET PRIVADO) ---")
         deploy_stack(STACK_NAME, TEMPLATE_V1_PATH)
-        get_stack_outputs(STACK_NAME)
+        stack = describe_stack(STACK_NAME)
+        get_stack_outputs(STACK_NAME, stack)
         input("\n>>> Pressione Enter para continuar para a ETAPA 2 (Update)...")
 
         # ETAPA 2
-        logging.info("\n--- INICIANDO ETAPA 2: DEPLOY DA V2 (SITE ESTÁTICO) ---")
-        deploy_stack(STACK_NAME, TEMPLATE_V2_PATH)
-        outputs = get_stack_outputs(STACK_NAME)
+        logger.info("\n--- INICIANDO ETAPA 2: DEPLOY DA V2 (SITE ESTÁTICO) ---")
+        # A varredura dos arquivos locais não depende da stack, então roda em
+        # uma thread separada enquanto o deploy aguarda o CloudFormation
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assets_future = executor.submit(collect_assets, ASSETS_S3_DIR)
+            deploy_stack(STACK_NAME, TEMPLATE_V2_PATH)
+            assets = assets_future.result()
+        # A descrição obtida aqui é reaproveitada também na exclusão da ETAPA 3
+        stack = describe_stack(STACK_NAME)
+        outputs = get_stack_outputs(STACK_NAME, stack)
         
         # --- CHAMADA DA NOVA FUNÇÃO DE UPLOAD ---
-        bucket_name = outputs.get('NomeDoBucketCriado')
+        bucket_name = outputs.get('NomeDoBucketCriado') if outputs else None
         if bucket_name:
-            upload_assets_to_s3(bucket_name, ASSETS_S3_DIR)
-            logging.info("Site implantado! Teste a URL do output 'URLdoSite'.")
+            upload_assets_to_s3(bucket_name, ASSETS_S3_DIR, assets)
+            logger.info("Site implantado! Teste a URL do output 'URLdoSite'.")
         else:
-            logging.error("Não foi possível encontrar o nome do bucket nos outputs da stack.")
+            logger.error("Não foi possível encontrar o nome do bucket nos outputs da stack.")
         
         input("\n>>> Pressione Enter para continuar para a ETAPA 3 (Exclusão)...")
 
         # ETAPA 3
-        logging.info("\n--- INICIANDO ETAPA 3: EXCLUSÃO DA STACK ---")
-        delete_stack(STACK_NAME)
+        logger.info("\n--- INICIANDO ETAPA 3: EXCLUSÃO DA STACK ---")
+        delete_stack(STACK_NAME, stack)
 
     except ClientError as e:
-        logging.error(f"Um erro do Boto3 ocorreu: {e.response['Error']['Message']}")
+        logger.error(f"Um erro do Boto3 ocorreu: {e.response['Error']['Message']}")
     except FileNotFoundError as e:
-        logging.error(f"Erro: Arquivo de template não encontrado. Verifique o caminho. {e}")
+        logger.error(f"Erro: Arquivo de template não encontrado. Verifique o caminho. {e}")
     except Exception as e:
-        logging.error(f"Um erro inesperado ocorreu: {e}")
\ No newline at end of file
+        logger.error(f"Um erro inesperado ocorreu: {e}")
\ No newline at end of file
@@ -12,15 +12,49 @@ Data: 2024-09-13
 
 import os
 import ipaddress
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente de um arquivo .env
 load_dotenv()
 
+# Configuração do logging; LOG_LEVEL=DEBUG/WARNING/... ajusta o nível de detalhe.
+# Com '%s', a mensagem só é formatada se o registro for de fato emitido.
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
-def create_vpc(ec2_client: boto3.client, cidr_block: str, vpc_tag_name: str) -> str:
+# Configuração dos clientes do Boto3: pool de conexões maior que o padrão (10),
+# para não serializar as chamadas feitas em paralelo pelas threads, retentativas
+# no modo 'adaptive' (que desacelera sozinho em caso de throttling) e TCP keepalive.
+BOTO_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True
+)
+
+
+def _is_dry_run_success(error: ClientError) -> bool:
+    """
+    Indica se o erro é a resposta de sucesso de uma chamada feita com DryRun=True.
+
+    Com DryRun, a AWS valida permissões e parâmetros sem executar a operação e
+    sinaliza o sucesso com o erro 'DryRunOperation'.
+
+    Args:
+        error (ClientError): Exceção lançada pelo Boto3.
+
+    Returns:
+        bool: True se a chamada teria sido executada com sucesso.
+    """
+    return error.response['Error']['Code'] == 'DryRunOperation'
+
+
+def create_vpc(ec2_client: boto3.client, cidr_block: str, vpc_tag_name: str, dry_run: bool = False) -> str:
     """
     Cria uma VPC na AWS.
 
@@ -28,28 +62,44 @@ def create_vpc(ec2_client: boto3.client, cidr_block: str, vpc_tag_name: str) ->
         ec2_client (boto3.client): Cliente Boto3 para o serviço EC2.
         cidr_block (str): Bloco CIDR para a VPC.
         vpc_tag_name (str): Nome da tag 'Name' para a VPC.
+        dry_run (bool, opcional): Se True, apenas valida a chamada (DryRun), sem criar nada.
 
     Returns:
-        str: O ID da VPC recém-criada, ou None em caso de falha.
+        str: O ID da VPC recém-criada ('vpc-dryrun' em dry run).
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
     """
     try:
-        print(f"Iniciando a criação da VPC com CIDR {cidr_block}...")
-        response = ec2_client.create_vpc(CidrBlock=cidr_block)
+        logger.info("Iniciando a criação da VPC com CIDR %s...", cidr_block)
+        # A tag é aplicada na própria requisição de criação (TagSpecifications),
+        # dispensando uma chamada extra a create_tags
+        response = ec2_client.create_vpc(
+            CidrBlock=cidr_block,
+            DryRun=dry_run,
+            TagSpecifications=[
+                {
+                    'ResourceType': 'vpc',
+                    'Tags': [{'Key': 'Name', 'Value': vpc_tag_name}]
+                }
+            ]
+        )
         vpc_id = response['Vpc']['VpcId']
-
-        ec2_client.create_tags(Resources=[vpc_id], Tags=[{'Key': 'Name', 'Value': vpc_tag_name}])
         
-        # Espera que a VPC esteja disponível
-        waiter = ec2_client.get_waiter('vpc_available')
-        waiter.wait(VpcIds=[vpc_id])
-        print(f"VPC {vpc_id} criada com sucesso!")
+        # Não há waiter 'vpc_available': sub-redes, IGW e tabelas de rotas já
+        # aceitam o ID da VPC assim que CreateVpc retorna, mesmo no estado 'pending'
+        logger.info("VPC %s criada com sucesso!", vpc_id)
         return vpc_id
     except ClientError as e:
-        print(f"Erro na API da AWS ao criar VPC: {e.response['Error']['Code']} - {e.response['Error']['Message']}")
-    return None
+        if _is_dry_run_success(e):
+            logger.info("[DRY RUN] Criação da VPC com CIDR %s validada.", cidr_block)
+            return 'vpc-dryrun'
+        logger.error("Erro na API da AWS ao criar VPC: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
 
 
-def create_subnet(ec2_client: boto3.client, vpc_id: str, cidr_block: str, availability_zone: str, subnet_tag_name: str) -> str:
+def create_subnet(ec2_client: boto3.client, vpc_id: str, cidr_block: str, availability_zone: str, subnet_tag_name: str,
+                  dry_run: bool = False) -> str:
     """
     Cria uma sub-rede em uma VPC específica.
 
@@ -59,25 +109,38 @@ def create_subnet(ec2_client: boto3.client, vpc_id: str, cidr_block: str, availa
         cidr_block (str): Bloco CIDR para a sub-rede.
         availability_zone (str): Zona de Disponibilidade da sub-rede.
         subnet_tag_name (str): Nome da tag 'Name' para a sub-rede.
+        dry_run (bool, opcional): Se True, apenas valida a chamada (DryRun), sem criar nada.
 
     Returns:
-        str: O ID da sub-rede recém-criada, ou None em caso de falha.
+        str: O ID da sub-rede recém-criada ('subnet-dryrun' em dry run).
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
     """
     try:
         response = ec2_client.create_subnet(
             VpcId=vpc_id, 
             CidrBlock=cidr_block, 
-            AvailabilityZone=availability_zone
+            AvailabilityZone=availability_zone,
+            DryRun=dry_run,
+            TagSpecifications=[
+                {
+                    'ResourceType': 'subnet',
+                    'Tags': [{'Key': 'Name', 'Value': subnet_tag_name}]
+                }
+            ]
         )
         subnet_id = response['Subnet']['SubnetId']
-        ec2_client.create_tags(Resources=[subnet_id], Tags=[{'Key': 'Name', 'Value': subnet_tag_name}])
-        print(f"Sub-rede {subnet_id} ({subnet_tag_name}) criada com CIDR {cidr_block} na AZ {availability_zone}")
+        logger.info("Sub-rede %s (%s) criada com CIDR %s na AZ %s", subnet_id, subnet_tag_name, cidr_block, availability_zone)
         return subnet_id
     except ClientError as e:
-        print(f"Erro na API da AWS ao criar sub-rede: {e.response['Error']['Code']} - {e.response['Error']['Message']}")
-    return None
+        if _is_dry_run_success(e):
+            logger.info("[DRY RUN] Criação da sub-rede %s (%s) na AZ %s validada.", subnet_tag_name, cidr_block, availability_zone)
+            return 'subnet-dryrun'
+        logger.error("Erro na API da AWS ao criar sub-rede: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
 
-def create_internet_gateway(ec2_client: boto3.client, vpc_id: str, vpc_tag_name: str) -> str:
+def create_internet_gateway(ec2_client: boto3.client, vpc_id: str, vpc_tag_name: str, dry_run: bool = False) -> str:
     """
     Cria, anexa e tagueia um Internet Gateway (IGW) a uma VPC.
 
@@ -85,12 +148,17 @@ def create_internet_gateway(ec2_client: boto3.client, vpc_id: str, vpc_tag_name:
         ec2_client (boto3.client): Cliente Boto3 para o serviço EC2.
         vpc_id (str): ID da VPC à qual o IGW será anexado.
         vpc_tag_name (str): Nome da tag 'Name' da VPC para compor a tag do IGW.
+        dry_run (bool, opcional): Se True, apenas valida a chamada (DryRun), sem criar nada.
 
     Returns:
-        str: O ID do IGW recém-criado, ou None em caso de falha.
+        str: O ID do IGW recém-criado ('igw-dryrun' em dry run).
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
     """
     try:
         response = ec2_client.create_internet_gateway(
+            DryRun=dry_run,
             TagSpecifications=[
                 {
                     'ResourceType': 'internet-gateway',
@@ -100,13 +168,17 @@ def create_internet_gateway(ec2_client: boto3.client, vpc_id: str, vpc_tag_name:
         )
         igw_id = response['InternetGateway']['InternetGatewayId']
         ec2_client.attach_internet_gateway(InternetGatewayId=igw_id, VpcId=vpc_id)
-        print(f"Internet Gateway {igw_id} ('{vpc_tag_name}-igw') criado e anexado à VPC {vpc_id}")
+        logger.info("Internet Gateway %s ('%s-igw') criado e anexado à VPC %s", igw_id, vpc_tag_name, vpc_id)
         return igw_id
     except ClientError as e:
-        print(f"Erro na API da AWS ao criar IGW: {e.response['Error']['Code']} - {e.response['Error']['Message']}")
-    return None
-
-def create_route_table(ec2_client: boto3.client, vpc_id: str, route_table_tag_name: str, igw_id: str = None, nat_gw_id: str = None) -> str:
+        if _is_dry_run_success(e):
+            logger.info("[DRY RUN] Criação do Internet Gateway '%s-igw' validada.", vpc_tag_name)
+            return 'igw-dryrun'
+        logger.error("Erro na API da AWS ao criar IGW: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
+
+def create_route_table(ec2_client: boto3.client, vpc_id: str, route_table_tag_name: str, igw_id: str = None, nat_gw_id: str = None,
+                       dry_run: bool = False) -> str:
     """
     Cria uma tabela de rotas e, opcionalmente, adiciona uma rota padrão.
 
@@ -116,39 +188,102 @@ def create_route_table(ec2_client: boto3.client, vpc_id: str, route_table_tag_na
         route_table_tag_name (str): Nome da tag 'Name' para a tabela de rotas.
         igw_id (str, opcional): ID do IGW para a rota padrão (0.0.0.0/0).
         nat_gw_id (str, opcional): ID do NAT Gateway para a rota padrão (0.0.0.0/0).
+        dry_run (bool, opcional): Se True, apenas valida a chamada (DryRun), sem criar nada.
 
     Returns:
-        str: O ID da tabela de rotas, ou None em caso de falha.
+        str: O ID da tabela de rotas ('rtb-dryrun' em dry run).
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
     """
     try:
-        response = ec2_client.create_route_table(VpcId=vpc_id)
+        response = ec2_client.create_route_table(
+            VpcId=vpc_id,
+            DryRun=dry_run,
+            TagSpecifications=[
+                {
+                    'ResourceType': 'route-table',
+                    'Tags': [{'Key': 'Name', 'Value': route_table_tag_name}]
+                }
+            ]
+        )
         route_table_id = response['RouteTable']['RouteTableId']
-        ec2_client.create_tags(Resources=[route_table_id], Tags=[{'Key': 'Name', 'Value': route_table_tag_name}])
         
         # Adiciona a rota padrão para o IGW ou NAT Gateway
+        if igw_id or nat_gw_id:
+            create_default_route(ec2_client, route_table_id, igw_id=igw_id, nat_gw_id=nat_gw_id)
+        else:
+            logger.info("Tabela de rotas %s criada sem rota padrão.", route_table_id)
+
+        return route_table_id
+    except ClientError as e:
+        if _is_dry_run_success(e):
+            logger.info("[DRY RUN] Criação da tabela de rotas %s validada.", route_table_tag_name)
+            return 'rtb-dryrun'
+        logger.error("Erro na API da AWS ao criar tabela de rotas: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
+
+def create_default_route(ec2_client: boto3.client, route_table_id: str, igw_id: str = None, nat_gw_id: str = None) -> None:
+    """
+    Adiciona a rota padrão (0.0.0.0/0) a uma tabela de rotas já existente.
+
+    Permite criar a tabela de rotas privada antes de o NAT Gateway ficar
+    disponível e incluir a rota só depois.
+
+    Args:
+        ec2_client (boto3.client): Cliente Boto3 para o serviço EC2.
+        route_table_id (str): ID da tabela de rotas.
+        igw_id (str, opcional): ID do IGW de destino da rota.
+        nat_gw_id (str, opcional): ID do NAT Gateway de destino da rota.
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
+    """
+    try:
         if igw_id:
             ec2_client.create_route(
                 RouteTableId=route_table_id,
                 DestinationCidrBlock='0.0.0.0/0',
                 GatewayId=igw_id
             )
-            print(f"Tabela de rotas pública {route_table_id} criada com rota para o IGW.")
-        elif nat_gw_id:
+            logger.info("Tabela de rotas pública %s criada com rota para o IGW.", route_table_id)
+        else:
             ec2_client.create_route(
                 RouteTableId=route_table_id,
                 DestinationCidrBlock='0.0.0.0/0',
                 NatGatewayId=nat_gw_id
             )
-            print(f"Tabela de rotas privada {route_table_id} criada com rota para o NAT GW.")
-        else:
-            print(f"Tabela de rotas {route_table_id} criada sem rota padrão.")
-
-        return route_table_id
+            logger.info("Rota para o NAT GW %s adicionada à tabela de rotas privada %s.", nat_gw_id, route_table_id)
     except ClientError as e:
-        print(f"Erro na API da AWS ao criar tabela de rotas: {e.response['Error']['Code']} - {e.response['Error']['Message']}")
-    return None
+        logger.error("Erro na API da AWS ao criar a rota padrão: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
 
-def create_nat_gateway(ec2_client: boto3.client, subnet_id: str, vpc_tag_name: str, az_name: str) -> str:
+def allocate_elastic_ip(ec2_client: boto3.client, dry_run: bool = False) -> str:
+    """
+    Aloca um Elastic IP (EIP) no escopo de VPC.
+
+    Args:
+        ec2_client (boto3.client): Cliente Boto3 para o serviço EC2.
+        dry_run (bool, opcional): Se True, apenas valida a chamada (DryRun), sem criar nada.
+
+    Returns:
+        str: O ID de alocação do EIP ('eipalloc-dryrun' em dry run).
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
+    """
+    try:
+        return ec2_client.allocate_address(Domain='vpc', DryRun=dry_run)['AllocationId']
+    except ClientError as e:
+        if _is_dry_run_success(e):
+            logger.info("[DRY RUN] Alocação do Elastic IP validada.")
+            return 'eipalloc-dryrun'
+        logger.error("Erro na API da AWS ao alocar Elastic IP: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
+
+def create_nat_gateway(ec2_client: boto3.client, subnet_id: str, vpc_tag_name: str, az_name: str,
+                       allocation_id: str = None, connectivity_type: str = 'public',
+                       dry_run: bool = False) -> str:
     """
     Cria um NAT Gateway em uma sub-rede pública, aloca um IP elástico e adiciona tags.
 
@@ -157,21 +292,32 @@ def create_nat_gateway(ec2_client: boto3.client, subnet_id: str, vpc_tag_name: s
         subnet_id (str): ID da sub-rede pública para o NAT Gateway.
         vpc_tag_name (str): Nome da tag 'Name' da VPC para compor a tag do NAT GW.
         az_name (str): Nome da Zona de Disponibilidade para compor a tag do NAT GW.
+        allocation_id (str, opcional): ID de um Elastic IP já alocado. Se omitido,
+            um novo EIP é alocado aqui.
+        connectivity_type (str, opcional): 'public' (padrão) ou 'private'. Um NAT
+            GW privado não usa EIP e não dá acesso à internet, apenas a outras redes.
+        dry_run (bool, opcional): Se True, apenas valida a chamada (DryRun), sem criar nada.
 
     Returns:
-        str: O ID do NAT Gateway, ou None em caso de falha.
+        str: O ID do NAT Gateway ('nat-dryrun' em dry run, sem aguardar o waiter).
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
     """
     try:
-        # 1. Aloca um Elastic IP (EIP)
-        print("Alocando um Elastic IP para o NAT Gateway...")
-        eip = ec2_client.allocate_address(Domain='vpc')
-        allocation_id = eip['AllocationId']
+        nat_args = {'SubnetId': subnet_id, 'ConnectivityType': connectivity_type, 'DryRun': dry_run}
+
+        # 1. Aloca um Elastic IP (EIP), necessário apenas para o NAT GW público
+        if connectivity_type == 'public':
+            if allocation_id is None:
+                logger.info("Alocando um Elastic IP para o NAT Gateway...")
+                allocation_id = allocate_elastic_ip(ec2_client, dry_run)
+            nat_args['AllocationId'] = allocation_id
 
         # 2. Cria o NAT Gateway
-        print("Criando o NAT Gateway...")
+        logger.info("Criando o NAT Gateway...")
         response = ec2_client.create_nat_gateway(
-            SubnetId=subnet_id,
-            AllocationId=allocation_id,
+            **nat_args,
             TagSpecifications=[
                 {
                     'ResourceType': 'natgateway',
@@ -182,17 +328,23 @@ def create_nat_gateway(ec2_client: boto3.client, subnet_id: str, vpc_tag_name: s
         nat_gw_id = response['NatGateway']['NatGatewayId']
         
         # 3. Espera que o NAT Gateway esteja disponível
-        print(f"Aguardando o NAT Gateway {nat_gw_id} ficar disponível...")
+        logger.info("Aguardando o NAT Gateway %s ficar disponível...", nat_gw_id)
+        # O NAT GW costuma ficar disponível em 30-60s; consultar a cada 5s (em vez
+        # dos 15s padrão) reduz a espera ociosa após ele ficar pronto. 60 tentativas
+        # mantêm uma margem de 5 minutos para os casos mais lentos.
         waiter = ec2_client.get_waiter('nat_gateway_available')
-        waiter.wait(NatGatewayIds=[nat_gw_id])
-        print(f"NAT Gateway {nat_gw_id} está disponível!")
+        waiter.wait(NatGatewayIds=[nat_gw_id], WaiterConfig={'Delay': 5, 'MaxAttempts': 60})
+        logger.info("NAT Gateway %s está disponível!", nat_gw_id)
         
         return nat_gw_id
     except ClientError as e:
-        print(f"Erro na API da AWS ao criar NAT Gateway: {e.response['Error']['Code']} - {e.response['Error']['Message']}")
-    return None
+        if _is_dry_run_success(e):
+            logger.info("[DRY RUN] Criação do NAT Gateway na sub-rede %s validada.", subnet_id)
+            return 'nat-dryrun'
+        logger.error("Erro na API da AWS ao criar NAT Gateway: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
 
-def associate_route_table(ec2_client: boto3.client, route_table_id: str, subnet_id: str) -> None:
+def associate_route_table(ec2_client: boto3.client, route_table_id: str, subnet_id: str, dry_run: bool = False) -> str:
     """
     Associa uma tabela de rotas a uma sub-rede.
 
@@ -200,100 +352,366 @@ def associate_route_table(ec2_client: boto3.client, route_table_id: str, subnet_
         ec2_client (boto3.client): Cliente Boto3 para o serviço EC2.
         route_table_id (str): ID da tabela de rotas a ser associada.
         subnet_id (str): ID da sub-rede a ser associada.
+        dry_run (bool, opcional): Se True, apenas valida a chamada (DryRun), sem criar nada.
+
+    Returns:
+        str: O ID da associação criada ('rtbassoc-dryrun' em dry run).
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
     """
     try:
-        ec2_client.associate_route_table(RouteTableId=route_table_id, SubnetId=subnet_id)
-        print(f"Tabela de rotas {route_table_id} associada à sub-rede {subnet_id}")
+        response = ec2_client.associate_route_table(RouteTableId=route_table_id, SubnetId=subnet_id, DryRun=dry_run)
+        logger.info("Tabela de rotas %s associada à sub-rede %s", route_table_id, subnet_id)
+        return response['AssociationId']
     except ClientError as e:
-        print(f"Erro na API da AWS ao associar a tabela de rotas: {e.response['Error']['Code']} - {e.response['Error']['Message']}")
+        if _is_dry_run_success(e):
+            logger.info("[DRY RUN] Associação da tabela de rotas %s à sub-rede %s validada.", route_table_id, subnet_id)
+            return 'rtbassoc-dryrun'
+        logger.error("Erro na API da AWS ao associar a tabela de rotas: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
 
 
-def main() -> None:
-    """Função principal que orquestra a criação da infraestrutura."""
+def subnet_cidrs_24(vpc_cidr: str, count: int) -> list:
+    """
+    Gera os blocos CIDR das primeiras 'count' sub-redes /24 de uma VPC.
+
+    Para o caso mais comum, uma VPC /16 alinhada (ex.: '10.0.0.0/16'), as
+    sub-redes seguem o padrão 'a.b.i.0/24' e são montadas direto a partir dos
+    octetos. Nos demais casos, o cálculo é feito pelo módulo ipaddress, que
+    também valida o CIDR.
+
+    Args:
+        vpc_cidr (str): Bloco CIDR da VPC.
+        count (int): Quantidade de sub-redes /24 necessárias.
+
+    Returns:
+        list: Os blocos CIDR das sub-redes, como strings, em ordem.
+
+    Raises:
+        ValueError: Se o CIDR for inválido ou não comportar 'count' sub-redes /24.
+    """
+    address, _, prefix = vpc_cidr.partition('/')
+    octets = address.split('.')
+    if (prefix == '16' and count <= 256 and len(octets) == 4
+            and all(o.isdigit() and o == str(int(o)) and int(o) <= 255 for o in octets)
+            and octets[2] == '0' and octets[3] == '0'):
+        a, b = octets[0], octets[1]
+        return [f"{a}.{b}.{i}.0/24" for i in range(count)]
+
+    # O gerador é consumido só até o necessário, em vez de materializar todas
+    # as sub-redes /24 possíveis
+    base_network = ipaddress.ip_network(vpc_cidr)
+    subnets = [str(subnet) for subnet in islice(base_network.subnets(new_prefix=24), count)]
+    if len(subnets) < count:
+        raise ValueError(f"O CIDR {vpc_cidr} não comporta {count} sub-redes /24.")
+    return subnets
+
+
+def get_available_azs(ec2_client: boto3.client, region: str) -> set:
+    """
+    Consulta, em uma única chamada, as Zonas de Disponibilidade disponíveis na região.
+
+    Args:
+        ec2_client (boto3.client): Cliente Boto3 para o serviço EC2.
+        region (str): Região da AWS a ser consultada.
+
+    Returns:
+        set: Os nomes das AZs da região no estado 'available'.
+
+    Raises:
+        ClientError: Se a chamada à API da AWS falhar.
+    """
     try:
-        vpc_tag_name = os.getenv('VPC_TAG_NAME', 'MyVPC')
-        region = os.getenv('REGION', 'us-east-1')
-        vpc_cidr = os.getenv('VPC_CIDR', '10.0.0.0/16')
-        az_list = os.getenv('AZ_LIST', 'us-east-1a,us-east-1b').split(',')
-        
-        if not az_list or az_list == ['']:
-            print("Lista de Zonas de Disponibilidade (AZ_LIST) não pode estar vazia.")
-            return
+        response = ec2_client.describe_availability_zones(
+            Filters=[
+                {'Name': 'region-name', 'Values': [region]},
+                {'Name': 'state', 'Values': ['available']}
+            ]
+        )
+        return {zone['ZoneName'] for zone in response['AvailabilityZones']}
+    except ClientError as e:
+        logger.error("Erro na API da AWS ao consultar as Zonas de Disponibilidade: %s - %s", e.response['Error']['Code'], e.response['Error']['Message'])
+        raise
 
-        ec2_client = boto3.client('ec2', region_name=region)
-        
-        # 1. Cria a VPC
-        vpc_id = create_vpc(ec2_client, vpc_cidr, vpc_tag_name)
-        if not vpc_id:
-            return
-
-        # Converte o CIDR da VPC em um objeto de rede
-        base_network = ipaddress.ip_network(vpc_cidr)
-        # Sub-divide a rede principal em sub-redes de tamanho /24
-        subnets_24 = list(base_network.subnets(new_prefix=24))
-
-        public_subnets = []
-        private_subnets = []
-        subnet_counter = 0
-
-        # 2. Cria sub-redes públicas e privadas em cada AZ
-        print("\nIniciando a criação das sub-redes...")
-        for az in az_list:
-            if az.strip():  # Garante que a AZ não é uma string vazia
-                public_cidr = str(subnets_24[subnet_counter * 2])
-                public_subnet_id = create_subnet(
-                    ec2_client, vpc_id, public_cidr, az, f"{vpc_tag_name}-public-{az.split('-')[-1]}"
-                )
-                if not public_subnet_id:
-                    return
-                public_subnets.append(public_subnet_id)
-                
-                private_cidr = str(subnets_24[(subnet_counter * 2) + 1])
-                private_subnet_id = create_subnet(
-                    ec2_client, vpc_id, private_cidr, az, f"{vpc_tag_name}-private-{az.split('-')[-1]}"
-                )
-                if not private_subnet_id:
-                    return
-                private_subnets.append(private_subnet_id)
-                
-                subnet_counter += 1
-        
-        # 3. Cria e anexa o Internet Gateway
-        print("\nIniciando a criação e anexo do Internet Gateway...")
-        igw_id = create_internet_gateway(ec2_client, vpc_id, vpc_tag_name)
-        if not igw_id:
-            return
-
-        # 4. Cria e associa a Tabela de Rotas Pública
-        print("\nCriando e configurando a Tabela de Rotas Pública...")
-        public_route_table_id = create_route_table(ec2_client, vpc_id, f"{vpc_tag_name}-public-rt", igw_id=igw_id)
-        if not public_route_table_id:
-            return
+
+def _track(future, created_resources: list, resource_type: str) -> None:
+    """
+    Registra em 'created_resources' o recurso devolvido pela future, assim que
+    ela terminar com sucesso, para que possa ser removido em caso de falha.
+
+    Args:
+        future (Future): Future cuja função retorna o ID do recurso criado.
+        created_resources (list): Lista de tuplas (tipo, ID) na ordem de criação.
+        resource_type (str): Tipo do recurso (ex.: 'subnet').
+    """
+    def _on_done(f):
+        if not f.cancelled() and f.exception() is None:
+            created_resources.append((resource_type, f.result()))
+    future.add_done_callback(_on_done)
+
+
+def _wait_all(futures: list) -> list:
+    """
+    Aguarda um grupo de futures e devolve os resultados na ordem original.
+
+    Na primeira falha, as futures que ainda não começaram são canceladas (evitando
+    chamadas inúteis contra uma VPC que será desfeita) e a exceção é propagada.
+
+    Args:
+        futures (list): Futures submetidas ao executor.
+
+    Returns:
+        list: Os resultados das futures, na mesma ordem da lista recebida.
+    """
+    for future in as_completed(futures):
+        if future.exception() is not None:
+            for pending in futures:
+                pending.cancel()
+            future.result()
+    return [future.result() for future in futures]
+
+
+def rollback_resources(ec2_client: boto3.client, created_resources: list) -> None:
+    """
+    Remove, na ordem inversa da criação, os recursos criados antes de uma falha.
+
+    A remoção é best-effort: um erro em um recurso é exibido e a limpeza segue
+    com os demais.
+
+    Args:
+        ec2_client (boto3.client): Cliente Boto3 para o serviço EC2.
+        created_resources (list): Lista de tuplas (tipo, ID) na ordem de criação.
+    """
+    vpc_id = next((rid for kind, rid in created_resources if kind == 'vpc'), None)
+    for kind, rid in reversed(created_resources):
+        try:
+            if kind == 'association':
+                ec2_client.disassociate_route_table(AssociationId=rid)
+            elif kind == 'route-table':
+                ec2_client.delete_route_table(RouteTableId=rid)
+            elif kind == 'nat-gateway':
+                ec2_client.delete_nat_gateway(NatGatewayId=rid)
+                # A sub-rede e o EIP só são liberados quando o NAT GW deixa de existir
+                waiter = ec2_client.get_waiter('nat_gateway_deleted')
+                waiter.wait(NatGatewayIds=[rid], WaiterConfig={'Delay': 5, 'MaxAttempts': 60})
+            elif kind == 'internet-gateway':
+                ec2_client.detach_internet_gateway(InternetGatewayId=rid, VpcId=vpc_id)
+                ec2_client.delete_internet_gateway(InternetGatewayId=rid)
+            elif kind == 'subnet':
+                ec2_client.delete_subnet(SubnetId=rid)
+            elif kind == 'eip':
+                ec2_client.release_address(AllocationId=rid)
+            elif kind == 'vpc':
+                ec2_client.delete_vpc(VpcId=rid)
+            logger.info("Recurso removido: %s %s", kind, rid)
+        except ClientError as e:
+            logger.warning("Não foi possível remover %s %s: %s - %s", kind, rid, e.response['Error']['Code'], e.response['Error']['Message'])
+
+
+def provision_region(region: str, vpc_cidr: str, az_list: list, vpc_tag_name: str,
+                     nat_connectivity_type: str = 'public', dry_run: bool = False) -> None:
+    """
+    Provisiona a VPC completa (sub-redes, IGW, NAT GW e tabelas de rotas) em uma região.
+
+    Cada região usa o seu próprio cliente EC2, então várias regiões podem ser
+    provisionadas ao mesmo tempo, em threads diferentes.
+
+    Args:
+        region (str): Região da AWS onde os recursos serão criados.
+        vpc_cidr (str): Bloco CIDR da VPC.
+        az_list (list): Zonas de Disponibilidade da região onde as sub-redes serão criadas.
+        vpc_tag_name (str): Nome da tag 'Name' da VPC, usado para compor as demais tags.
+        nat_connectivity_type (str, opcional): 'public' (padrão) ou 'private'.
+        dry_run (bool, opcional): Se True, todas as chamadas são feitas com DryRun,
+            validando permissões e parâmetros sem criar nenhum recurso.
+
+    Raises:
+        Exception: Qualquer falha no provisionamento, depois de removidos os
+            recursos que já haviam sido criados.
+    """
+    # Recursos criados até o momento, como tuplas (tipo, ID), na ordem de criação
+    created_resources = []
+    ec2_client = None
+    try:
+        # Descarta entradas vazias (ex.: vírgula sobrando no fim da lista)
+        azs = [az.strip() for az in az_list if az.strip()]
         
-        for subnet_id in public_subnets:
-            associate_route_table(ec2_client, public_route_table_id, subnet_id)
-
-        # 5. Cria NAT Gateway (um por AZ pública para alta disponibilidade, mas um é suficiente para exemplo)
-        print("\nCriando e configurando o NAT Gateway...")
-        # Escolhe a primeira sub-rede pública para o NAT Gateway
-        nat_gateway_id = create_nat_gateway(ec2_client, public_subnets[0], 
-                                            vpc_tag_name, az_list[0].split('-')[-1])
-        if not nat_gateway_id:
-            return
-
-        # 6. Cria e associa a Tabela de Rotas Privada
-        print("\nCriando e configurando a Tabela de Rotas Privada...")
-        private_route_table_id = create_route_table(ec2_client, vpc_id, f"{vpc_tag_name}-private-rt", nat_gw_id=nat_gateway_id)
-        if not private_route_table_id:
-            return
-            
-        for subnet_id in private_subnets:
-            associate_route_table(ec2_client, private_route_table_id, subnet_id)
-
-        print("\nProvisionamento da VPC e sub-redes concluído com sucesso! 👏")
+        if not azs:
+            raise ValueError(f"Nenhuma Zona de Disponibilidade informada para a região {region}.")
+
+        # Sufixos das AZs (ex.: 'us-east-1a' -> '1a') e nomes das sub-redes,
+        # calculados uma única vez e reaproveitados nas etapas seguintes
+        az_suffixes = [az.rsplit('-', 1)[-1] for az in azs]
+        public_tags = [f"{vpc_tag_name}-public-{az_suffix}" for az_suffix in az_suffixes]
+        private_tags = [f"{vpc_tag_name}-private-{az_suffix}" for az_suffix in az_suffixes]
+
+        # Sub-divide a rede principal em sub-redes de tamanho /24 (2 por AZ)
+        subnets_24 = subnet_cidrs_24(vpc_cidr, 2 * len(azs))
+
+        # As sub-redes (2 por AZ) são criadas em paralelo com o IGW e os EIPs (1 por AZ);
+        # depois, os NAT GWs (1 por AZ) correm junto com as associações das tabelas
+        # (2 por AZ). O pool de conexões do cliente precisa comportar todas as threads.
+        client_config = BOTO_CONFIG.merge(Config(max_pool_connections=max(50, 3 * len(azs) + 4)))
+        ec2_client = boto3.client('ec2', region_name=region, config=client_config)
+
+        # Valida as AZs antes de qualquer chamada que crie recursos: um nome errado
+        # em AZ_LIST falharia só na criação das sub-redes, com a VPC já criada
+        valid_azs = get_available_azs(ec2_client, region)
+        invalid_azs = [az for az in azs if az not in valid_azs]
+        if invalid_azs:
+            raise ValueError(
+                f"AZ(s) inválida(s) ou indisponível(is) na região {region}: {', '.join(invalid_azs)}. "
+                f"Disponíveis: {', '.join(sorted(valid_azs))}."
+            )
+
+        # O cliente do Boto3 é thread-safe, então um único cliente é compartilhado
+        # por todas as chamadas feitas em paralelo.
+        with ThreadPoolExecutor(max_workers=3 * len(azs) + 2) as executor:
+            # Os Elastic IPs dos NAT GWs públicos (um por AZ) não dependem de nenhum
+            # outro recurso, então são alocados em segundo plano desde o início,
+            # escondendo sua latência
+            eip_futures = []
+            if nat_connectivity_type == 'public':
+                eip_futures = [executor.submit(allocate_elastic_ip, ec2_client, dry_run) for _ in azs]
+                for future in eip_futures:
+                    _track(future, created_resources, 'eip')
+
+            # 1. Cria a VPC
+            vpc_id = create_vpc(ec2_client, vpc_cidr, vpc_tag_name, dry_run)
+            created_resources.append(('vpc', vpc_id))
+
+            # 2. Cria e anexa o Internet Gateway
+            # O IGW depende apenas da VPC, então é criado em paralelo com as sub-redes
+            logger.info("Iniciando a criação e anexo do Internet Gateway...")
+            igw_future = executor.submit(create_internet_gateway, ec2_client, vpc_id, vpc_tag_name, dry_run)
+            _track(igw_future, created_resources, 'internet-gateway')
+
+            # 3. Cria sub-redes públicas e privadas em cada AZ
+            # Cada CreateSubnet é uma ida e volta à API limitada pela latência de rede,
+            # então todas as chamadas são disparadas ao mesmo tempo. A lista de tarefas
+            # alterna pública/privada por AZ: índices pares são públicos, ímpares privados.
+            logger.info("Iniciando a criação das sub-redes...")
+            tasks = []
+            for i, az in enumerate(azs):
+                tasks.append((subnets_24[i * 2], az, public_tags[i]))
+                tasks.append((subnets_24[i * 2 + 1], az, private_tags[i]))
+
+            subnet_futures = [executor.submit(create_subnet, ec2_client, vpc_id, *task, dry_run) for task in tasks]
+            for future in subnet_futures:
+                _track(future, created_resources, 'subnet')
+            subnet_ids = _wait_all(subnet_futures)
+            public_subnets = subnet_ids[0::2]
+            private_subnets = subnet_ids[1::2]
+
+            igw_id = igw_future.result()
+
+            # 4. Cria um NAT Gateway por AZ, para alta disponibilidade
+            # Um NAT GW público precisa de uma sub-rede pública e do IGW já anexado à VPC.
+            # Como cada um leva cerca de um minuto para ficar disponível, todos são
+            # iniciados juntos em segundo plano (os waiters correm em paralelo) assim
+            # que essas dependências existem; enquanto isso, as tabelas de rotas e
+            # suas associações seguem normalmente.
+            logger.info("Iniciando a criação dos NAT Gateways em segundo plano...")
+            allocation_ids = _wait_all(eip_futures) if eip_futures else [None] * len(azs)
+            nat_futures = [
+                executor.submit(create_nat_gateway, ec2_client, public_subnets[i], vpc_tag_name,
+                                az_suffixes[i], allocation_ids[i], nat_connectivity_type, dry_run)
+                for i in range(len(azs))
+            ]
+            for future in nat_futures:
+                _track(future, created_resources, 'nat-gateway')
+
+            # 5. Cria a Tabela de Rotas Pública e uma Tabela de Rotas Privada por AZ
+            # As tabelas não dependem umas das outras, então são criadas ao mesmo
+            # tempo. As privadas nascem sem a rota padrão, que só é adicionada quando
+            # o NAT GW da respectiva AZ estiver disponível.
+            logger.info("Criando e configurando as Tabelas de Rotas Pública e Privadas...")
+            route_table_futures = [
+                executor.submit(create_route_table, ec2_client, vpc_id, f"{vpc_tag_name}-public-rt", igw_id=igw_id, dry_run=dry_run)
+            ] + [
+                executor.submit(create_route_table, ec2_client, vpc_id, f"{vpc_tag_name}-private-rt-{az_suffix}", dry_run=dry_run)
+                for az_suffix in az_suffixes
+            ]
+            for future in route_table_futures:
+                _track(future, created_resources, 'route-table')
+            public_route_table_id, *private_route_table_ids = _wait_all(route_table_futures)
+
+            # A tabela pública atende todas as sub-redes públicas; cada sub-rede privada
+            # usa a tabela privada da sua AZ. Todas as associações rodam em paralelo.
+            association_futures = [
+                executor.submit(associate_route_table, ec2_client, public_route_table_id, subnet_id, dry_run)
+                for subnet_id in public_subnets
+            ] + [
+                executor.submit(associate_route_table, ec2_client, route_table_id, subnet_id, dry_run)
+                for route_table_id, subnet_id in zip(private_route_table_ids, private_subnets)
+            ]
+            for future in association_futures:
+                _track(future, created_resources, 'association')
+            _wait_all(association_futures)
+
+            # Só aqui as tabelas privadas precisam dos NAT GWs: aguarda sua criação
+            logger.info("Aguardando os NAT Gateways...")
+            nat_gateway_ids = _wait_all(nat_futures)
+
+            # 6. Adiciona a rota padrão de cada Tabela de Rotas Privada para o NAT GW da sua AZ.
+            # Em dry run os IDs são fictícios, então as rotas não podem ser validadas.
+            if not dry_run:
+                _wait_all([
+                    executor.submit(create_default_route, ec2_client, route_table_id, nat_gw_id=nat_gateway_id)
+                    for route_table_id, nat_gateway_id in zip(private_route_table_ids, nat_gateway_ids)
+                ])
+
+        if dry_run:
+            logger.info("[DRY RUN] Plano de provisionamento da região %s validado; nenhum recurso foi criado.", region)
+        else:
+            logger.info("Provisionamento da VPC e sub-redes na região %s concluído com sucesso! 👏", region)
 
     except Exception as e:
-        print(f"O processo de provisionamento foi interrompido devido a um erro: {e}")
+        logger.error("O processo de provisionamento na região %s foi interrompido devido a um erro: %s", region, e)
+        # Ao sair do bloco 'with', todas as threads já terminaram, então
+        # 'created_resources' está completa
+        # Em dry run os IDs são fictícios e não há nada a remover
+        if created_resources and not dry_run:
+            logger.info("Removendo os %d recurso(s) já criado(s) na região %s...", len(created_resources), region)
+            rollback_resources(ec2_client, created_resources)
+        raise
+
+
+def main() -> None:
+    """Função principal que orquestra a criação da infraestrutura."""
+    vpc_tag_name = os.getenv('VPC_TAG_NAME', 'MyVPC')
+    # REGION_LIST permite provisionar várias regiões; sem ela, vale a REGION única
+    regions = [r.strip() for r in os.getenv('REGION_LIST', os.getenv('REGION', 'us-east-1')).split(',') if r.strip()]
+    vpc_cidr = os.getenv('VPC_CIDR', '10.0.0.0/16')
+    # Descarta entradas vazias e espaços uma única vez, antes de dividir as AZs por região
+    az_list = [az.strip() for az in os.getenv('AZ_LIST', 'us-east-1a,us-east-1b').split(',') if az.strip()]
+    nat_connectivity_type = os.getenv('NAT_CONNECTIVITY_TYPE', 'public')
+    # DRY_RUN=true valida o plano inteiro (permissões e parâmetros) sem criar recursos
+    dry_run = os.getenv('DRY_RUN', '').lower() == 'true'
+
+    if not az_list:
+        logger.error("Lista de Zonas de Disponibilidade (AZ_LIST) não pode estar vazia.")
+        return
+
+    # Os endpoints de cada região são independentes, então as regiões são
+    # provisionadas em paralelo. Com várias regiões, cada uma recebe apenas as
+    # AZs de AZ_LIST que lhe pertencem (ex.: 'us-west-2a' vai para 'us-west-2').
+    with ThreadPoolExecutor(max_workers=len(regions)) as executor:
+        futures = [
+            executor.submit(
+                provision_region, region, vpc_cidr,
+                az_list if len(regions) == 1 else [az for az in az_list if az.startswith(region)],
+                vpc_tag_name, nat_connectivity_type, dry_run
+            )
+            for region in regions
+        ]
+        # A falha de uma região não interrompe as demais; ela já foi exibida
+        # (e desfeita) por provision_region
+        failures = sum(1 for future in as_completed(futures) if future.exception() is not None)
+
+    if failures:
+        raise SystemExit(f"O provisionamento falhou em {failures} de {len(regions)} região(ões).")
 
 
 if __name__ == "__main__":